@@ -19,6 +19,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from itertools import accumulate
+
 from libqtile.layout.base import _SimpleLayoutBase
 
 
@@ -97,101 +99,193 @@ class VerticalTile(_SimpleLayoutBase):
         _SimpleLayoutBase.__init__(self, **config)
         self.add_defaults(VerticalTile.defaults)
         self.maximized = None
+        self._maximized_index = None
+        self._geom = []
+        self._geom_key = None
+        self._rebuild_margins()
 
     def add(self, window):
-        return self.clients.add(window, 1)
+        self.clients.add(window, 1)
+        self._update_maximized_index()
 
     def remove(self, window):
         if self.maximized is window:
             self.maximized = None
-        return self.clients.remove(window)
+        next_client = self.clients.remove(window)
+        self._update_maximized_index()
+        return next_client
 
     def clone(self, group):
         c = _SimpleLayoutBase.clone(self, group)
         c.maximized = None
+        c._maximized_index = None
+        c._geom = []
+        c._geom_key = None
         return c
 
-    def configure(self, window, screen_rect):
-        if self.clients and window in self.clients:
-            n = len(self.clients)
-            index = self.clients.index(window)
-
-            # border
-            if n > 1:
-                border_width = self.border_width
-            else:
-                border_width = 0
+    def _update_maximized_index(self):
+        # keep the position of the maximized client around, so laying out
+        # doesn't need to search for it
+        if self.maximized is None:
+            self._maximized_index = None
+        else:
+            self._maximized_index = self.clients.index(self.maximized)
 
-            if window.has_focus:
-                border_color = self.border_focus
-            else:
-                border_color = self.border_normal
+    def _rebuild_margins(self):
+        """Prepare the margins of the first, middle, last and a single pane
 
-            # width
-            if n > 1:
-                width = screen_rect.width - self.border_width * 2
-            else:
-                width = screen_rect.width
-
-            # height
-            if n > 1:
-                main_area_height = int(screen_rect.height * self.ratio)
-                sec_area_height = screen_rect.height - main_area_height
-
-                main_pane_height = main_area_height - border_width * 2
-                sec_pane_height = sec_area_height // (n - 1) - border_width * 2
-                normal_pane_height = (screen_rect.height // n) - (border_width * 2)
-
-                if self.maximized:
-                    if window is self.maximized:
-                        height = main_pane_height
-                    else:
-                        height = sec_pane_height
-                else:
-                    height = normal_pane_height
+        Neighbouring panes only get half of the margin between them, so the
+        gap is as wide as the one to the screen edge.
+        """
+        margin = self.margin
+        if isinstance(margin, list):
+            self._cached_margin = list(margin)
+        else:
+            self._cached_margin = margin
+            margin = [margin] * 4
+        top, right, bottom, left = margin[0], margin[1], margin[2], margin[3]
+        # round the upper half up and the lower half down, so odd margins
+        # still add up to the full gap
+        top_half = (top + 1) // 2
+        bottom_half = bottom // 2
+
+        self._margin_solo = [top, right, bottom, left]
+        self._margin_first = [top, right, bottom_half, left]
+        self._margin_middle = [top_half, right, bottom_half, left]
+        self._margin_last = [top_half, right, bottom, left]
+        self._geom_key = None
+
+    @property
+    def _normalized_margin(self):
+        """The margin option as a [N, E, S, W] list
+
+        The pane margins are rebuilt first if the option has been changed.
+        """
+        if self._cached_margin != self.margin:
+            self._rebuild_margins()
+        return self._margin_solo
+
+    def layout(self, windows, screen_rect):
+        n = len(self.clients)
+        if n > 1:
+            self._compute_layout(screen_rect)
+        positions = {client: index for index, client in enumerate(self.clients)}
+
+        # only one window can have the focus, so look it up once instead of
+        # asking every window
+        focused = self.group.qtile.current_window
+        border_focus = self.border_focus
+        border_normal = self.border_normal
+
+        for window in windows:
+            index = positions.get(window)
+            if index is None:
+                window.hide()
+                continue
+            border_color = border_focus if window is focused else border_normal
+            if n == 1:
+                self._configure_single(window, border_color, screen_rect)
             else:
-                height = screen_rect.height
+                self._configure_one(window, index, border_color, screen_rect)
+
+    def _compute_layout(self, screen_rect):
+        """Calculate the geometry of all panes in a single pass
+
+        The panes are stored by position, so the result only depends on the
+        screen, the number of clients, the position of the maximized one and
+        the layout options. It is kept until one of them changes.
+        """
+        margin = self._normalized_margin
+        n = len(self.clients)
+        key = (
+            screen_rect.x,
+            screen_rect.y,
+            screen_rect.width,
+            screen_rect.height,
+            n,
+            self._maximized_index,
+            self.ratio,
+            self.border_width,
+        )
+        if key == self._geom_key:
+            return
+        self._geom_key = key
+        self._geom = []
 
-            # y
-            y = screen_rect.y
+        if n == 1:
+            self._geom.append(
+                (screen_rect.y, screen_rect.height, screen_rect.width, 0, margin)
+            )
+        elif n > 1:
+            border_width = self.border_width
+            width = screen_rect.width - border_width * 2
 
-            if n > 1:
-                if self.maximized:
-                    y += (index * sec_pane_height) + (border_width * 2 * index)
-                else:
-                    y += (index * normal_pane_height) + (border_width * 2 * index)
+            main_area_height = int(screen_rect.height * self.ratio)
+            sec_area_height = screen_rect.height - main_area_height
 
-                if self.maximized and window is not self.maximized:
-                    if index > self.clients.index(self.maximized):
-                        y = y - sec_pane_height + main_pane_height
+            main_pane_height = main_area_height - border_width * 2
+            sec_pane_height = sec_area_height // (n - 1) - border_width * 2
+            normal_pane_height = (screen_rect.height // n) - (border_width * 2)
 
-            margin_size = self.margin
-            if not isinstance(margin_size, list):
-                margin_size = [margin_size] * 4
+            if self._maximized_index is None:
+                heights = [normal_pane_height] * n
+            else:
+                heights = [sec_pane_height] * n
+                heights[self._maximized_index] = main_pane_height
+            ys = accumulate([screen_rect.y] + [h + border_width * 2 for h in heights[:-1]])
+            margins = [self._margin_first] + [self._margin_middle] * (n - 2) + [self._margin_last]
 
-            margin_size = [
-                    round((margin_size[0] + 0.1)/2) if window != self.clients[0] and self.clients[0] != self.clients[-1] else margin_size[0],
-                    margin_size[1],
-                    round((margin_size[2] - 0.1)/2) if window != self.clients[-1] and self.clients[0] != self.clients[-1] else margin_size[2],
-                    margin_size[3],
-                ]
+            self._geom = [
+                (y, height, width, border_width, margin)
+                for y, height, margin in zip(ys, heights, margins)
+            ]
 
-            window.place(
-                screen_rect.x, y, width, height, border_width, border_color, margin=margin_size
-            )
-            window.unhide()
-        else:
-            window.hide()
+    def configure(self, window, screen_rect):
+        for index, client in enumerate(self.clients):
+            if client is window:
+                if window.has_focus:
+                    border_color = self.border_focus
+                else:
+                    border_color = self.border_normal
+                self._compute_layout(screen_rect)
+                self._configure_one(window, index, border_color, screen_rect)
+                return
+        window.hide()
+
+    def _configure_single(self, window, border_color, screen_rect):
+        # a single pane simply covers the whole screen, without a border
+        self._place(
+            window,
+            screen_rect.x,
+            screen_rect.y,
+            screen_rect.width,
+            screen_rect.height,
+            0,
+            border_color,
+            self._normalized_margin,
+        )
+
+    def _configure_one(self, window, index, border_color, screen_rect):
+        y, height, width, border_width, margin_size = self._geom[index]
+        self._place(
+            window, screen_rect.x, y, width, height, border_width, border_color, margin_size
+        )
+
+    def _place(self, window, x, y, width, height, border_width, border_color, margin):
+        window.place(x, y, width, height, border_width, border_color, margin=margin)
+        window.unhide()
+
+    def _change_ratio(self, delta):
+        ratio = self.ratio + delta
+        if 0 < ratio < 1:
+            self.ratio = ratio
+            self.group.layout_all()
 
     def grow(self):
-        if self.ratio + self.steps < 1:
-            self.ratio += self.steps
-            self.group.layout_all()
+        self._change_ratio(self.steps)
 
     def shrink(self):
-        if self.ratio - self.steps > 0:
-            self.ratio -= self.steps
-            self.group.layout_all()
+        self._change_ratio(-self.steps)
 
     cmd_previous = _SimpleLayoutBase.previous
     cmd_next = _SimpleLayoutBase.next
@@ -200,34 +294,44 @@ class VerticalTile(_SimpleLayoutBase):
     cmd_down = cmd_next
 
     def cmd_shuffle_up(self):
+        if self.clients.current_index == 0:
+            return
         self.clients.shuffle_up()
+        self._update_maximized_index()
         self.group.layout_all()
 
     def cmd_shuffle_down(self):
+        if self.clients.current_index + 1 >= len(self.clients):
+            return
         self.clients.shuffle_down()
+        self._update_maximized_index()
         self.group.layout_all()
 
     def cmd_maximize(self):
-        if self.clients:
+        if self.clients and self.maximized is not self.clients.current_client:
             self.maximized = self.clients.current_client
+            self._maximized_index = self.clients.current_index
             self.group.layout_all()
 
     def cmd_normalize(self):
+        if self.maximized is None:
+            return
         self.maximized = None
+        self._maximized_index = None
         self.group.layout_all()
 
     def cmd_grow(self):
         if not self.maximized:
             return
         if self.clients.current_client is self.maximized:
-            self.grow()
+            self._change_ratio(self.steps)
         else:
-            self.shrink()
+            self._change_ratio(-self.steps)
 
     def cmd_shrink(self):
         if not self.maximized:
             return
         if self.clients.current_client is self.maximized:
-            self.shrink()
+            self._change_ratio(-self.steps)
         else:
-            self.grow()
+            self._change_ratio(self.steps)
@@ -51,6 +51,34 @@ class VerticalTileConfig(Config):
 verticaltile_config = pytest.mark.parametrize("manager", [VerticalTileConfig], indirect=True)
 
 
+class VerticalTileMarginConfig(VerticalTileConfig):
+    layouts = [layout.VerticalTile(margin=5)]
+
+
+verticaltile_margin_config = pytest.mark.parametrize(
+    "manager", [VerticalTileMarginConfig], indirect=True
+)
+
+
+class VerticalTileMaxConfig(VerticalTileConfig):
+    layouts = [layout.VerticalTile(), layout.Max()]
+
+
+verticaltile_max_config = pytest.mark.parametrize(
+    "manager", [VerticalTileMaxConfig], indirect=True
+)
+
+
+def visible_windows(manager):
+    # wayland windows know whether they are mapped, x11 ones whether hidden
+    success, result = manager.c.eval(
+        "sorted(w.name for w in self.current_group.windows"
+        " if getattr(w, 'mapped', not getattr(w, 'hidden', False)))"
+    )
+    assert success, result
+    return eval(result)
+
+
 @verticaltile_config
 def test_verticaltile_simple(manager):
     manager.test_window("one")
@@ -72,6 +100,70 @@ def test_verticaltile_maximize(manager):
     assert_dimensions(manager, 0, 150, 798, 448)
 
 
+@verticaltile_config
+def test_verticaltile_shuffle_maximized(manager):
+    manager.test_window("one")
+    manager.test_window("two")
+    manager.c.layout.maximize()
+    assert_dimensions(manager, 0, 150, 798, 448)
+    # The maximized pane keeps its size when moved to the top
+    manager.c.layout.shuffle_up()
+    assert manager.c.layout.info()["clients"] == ["two", "one"]
+    assert_dimensions(manager, 0, 0, 798, 448)
+    manager.c.layout.shuffle_down()
+    assert_dimensions(manager, 0, 150, 798, 448)
+
+
+@verticaltile_config
+def test_verticaltile_fullscreen(manager):
+    manager.test_window("one")
+    manager.test_window("two")
+    assert_dimensions(manager, 0, 300, 798, 298)
+    manager.c.window.toggle_fullscreen()
+    assert_dimensions(manager, 0, 0, 800, 600)
+    # The window goes back to its pane
+    manager.c.window.toggle_fullscreen()
+    assert_dimensions(manager, 0, 300, 798, 298)
+
+
+@verticaltile_max_config
+def test_verticaltile_setlayout(manager):
+    manager.test_window("one")
+    manager.test_window("two")
+    assert_dimensions(manager, 0, 300, 798, 298)
+    manager.c.group.setlayout("max")
+    assert_dimensions(manager, 0, 0, 800, 600)
+    # Switching back restores the panes moved by the other layout
+    manager.c.group.setlayout("verticaltile")
+    assert_dimensions(manager, 0, 300, 798, 298)
+
+
+@verticaltile_max_config
+def test_verticaltile_setlayout_unhides(manager):
+    manager.test_window("one")
+    manager.test_window("two")
+    manager.c.group.setlayout("max")
+    assert visible_windows(manager) == ["two"]
+    # Windows hidden by the other layout are shown again
+    manager.c.group.setlayout("verticaltile")
+    assert visible_windows(manager) == ["one", "two"]
+
+
+@verticaltile_margin_config
+def test_verticaltile_margin(manager):
+    manager.test_window("one")
+    assert_dimensions(manager, 5, 5, 790, 590)
+    manager.test_window("two")
+    assert_dimensions(manager, 5, 303, 788, 290)
+    manager.test_window("three")
+    assert_dimensions(manager, 5, 403, 788, 190)
+    # Neighbouring panes share the margin between them
+    manager.c.layout.previous()
+    assert_dimensions(manager, 5, 203, 788, 193)
+    manager.c.layout.previous()
+    assert_dimensions(manager, 5, 5, 788, 191)
+
+
 @verticaltile_config
 def test_verticaltile_window_focus_cycle(manager):
     # setup 3 tiled and two floating clients